@@ -2,42 +2,50 @@
 功能概述：
     1. 连接CTP接口并订阅合约行情（期货）。
     2. 获取原始Tick行情（通过自定义事件EVENT_ORIGINAL_TICK）。
-    3. 将包含合约代码、交易所、时间等信息的Tick数据，以字符串形式一行行地保存到本地txt文件中。
+    3. 将包含合约代码、交易所、时间等信息的Tick数据，以CSV格式一行行地追加保存到本地csv文件中。
+       （也可选择定长二进制格式保存到bin文件，读取时无需解析文本，格式定义见tick_binary.py）
 
 依赖：
-    - event4record：自定义事件引擎模块，需包含EventEngine、Event等基础类及常量EVENT_ORIGINAL_TICK。
+    - event4record：自定义事件引擎模块，需包含EventEngine、Event等基础类及常量EVENT_ORIGINAL_TICK、EVENT_TIMER
+      （EVENT_TIMER即vnpy事件引擎自带的定时器事件，复制vnpy/event源码时一并保留即可）。
     - ctpgateway4record：自定义CTP网关模块，需包含CtpGateway类。
     - vnpy/trader 相关类与方法：用于加载配置、订阅行情以及部分数据结构定义。
     
 使用前：
     - 确保当前文件夹下存在 connect_ctp.json，该文件包含CTP经纪商、账户等连接信息。
-    - 运行脚本后，会在当前工作目录下自动创建“tick_data”文件夹，并将实时的Tick数据写入对应的txt文件。
+    - 运行脚本后，会在当前工作目录下自动创建“tick_data”文件夹，并将实时的Tick数据写入对应的csv文件。
 """
 
-from event4record import EventEngine, Event, EVENT_ORIGINAL_TICK
+from event4record import EventEngine, Event, EVENT_ORIGINAL_TICK, EVENT_TIMER
 from ctpgateway4record import CtpGateway
+from tick_binary import pack_tick
 from vnpy.trader.utility import load_json
 from vnpy.trader.object import LogData, ContractData, SubscribeRequest
 from vnpy.trader.event import EVENT_LOG, EVENT_CONTRACT
 from vnpy.trader.constant import Product
 from pathlib import Path
-from datetime import datetime
+from collections import defaultdict
+from operator import itemgetter
+import atexit
+import csv
+import time
 
 
 class TickRecorder:
     """
     TickRecorder 类：
-        - 负责连接CTP，并将原始Tick数据记录到本地txt文件中。
+        - 负责连接CTP，并将原始Tick数据记录到本地csv文件中。
         - 通过事件引擎，监听日志事件、合约事件、原始Tick事件，分别执行不同的处理逻辑。
     """
-    def __init__(self):
+    def __init__(self, binary: bool = False):
         """
         构造函数：
+            - binary：为True时以定长二进制格式写入bin文件（只保留合成TickData所需字段），默认写入csv文件
             1. 创建并启动事件引擎。
             2. 实例化CTPGateway。
             3. 准备存放合约的字典，以便订阅和检索对应信息。
-            4. 注册事件处理函数。
-            5. 创建文件夹用于存放记录的Tick数据txt文件。
+            4. 创建文件夹用于存放记录的Tick数据csv文件，并准备按合约分组的写入缓冲区。
+            5. 注册事件处理函数。
         """
         # 1) 创建并启动事件引擎
         self.event_engine = EventEngine()
@@ -52,12 +60,36 @@ class TickRecorder:
         # 3) 用于存放合约信息的字典，key为symbol(str)，value为ContractData对象
         self.contracts = {}
 
-        # 4) 注册事件处理函数
-        self.register_handlers()
+        # 合约对应的交易所代码字符串，key为symbol(str)，收到合约时一次性取出枚举值，避免每个tick都访问枚举
+        self._exchange_value_for: dict[str, str] = {}
+
+        # 本地时间字符串按秒缓存：同一秒内的tick直接复用，只在进入新的一秒时格式化一次
+        self._localtime_second: int = 0
+        self._localtime_str: str = ''
 
-        # 5) 创建数据保存目录（默认目录名为tick_data，可自行修改）
+        # 4) 创建数据保存目录（默认目录名为tick_data，可自行修改）
         self.data_directory: Path = Path.cwd() / 'tick_data'
         self.data_directory.mkdir(exist_ok=True)
+        self.binary: bool = binary
+
+        #    按文件名缓存待写入的tick行、列顺序及按列顺序取值的itemgetter，攒够一批后再一次性写入文件
+        #    （不长期持有文件句柄，订阅数百个合约时也不会占用大量句柄和写缓冲内存）
+        self._buffers: dict[str, list[tuple | bytes]] = defaultdict(list)
+        self._headers: dict[str, list[str]] = {}
+        self._row_getters: dict[str, itemgetter] = {}
+        self._buffer_limit: int = 256
+
+        #    不活跃合约的缓冲区可能很久都攒不满：定时器事件中检查每个缓冲区中最早一条tick的写入时间，
+        #    超过self._flush_interval秒仍未写盘的缓冲区直接写入，避免tick长时间停留在内存中。
+        #    活跃合约（约每秒2个tick）约128秒即可攒满一批，间隔取180秒，正常情况下仍按整批写入
+        self._flush_interval: int = 180
+        self._buffer_started: dict[str, float] = {}
+
+        # 5) 注册事件处理函数（缓冲区准备好之后再注册，定时器事件不会先于缓冲区初始化触发）
+        self.register_handlers()
+
+        # 进程正常退出时先停止事件引擎，再将缓冲区中剩余的tick写入磁盘
+        atexit.register(self.close)
 
     def register_handlers(self):
         """
@@ -65,10 +97,12 @@ class TickRecorder:
             - EVENT_LOG       -> self.log_handler
             - EVENT_CONTRACT  -> self.handle_contract_event
             - EVENT_ORIGINAL_TICK -> self.handle_original_tick
+            - EVENT_TIMER     -> self.handle_timer
         """
         self.event_engine.register(EVENT_LOG, self.log_handler)
         self.event_engine.register(EVENT_CONTRACT, self.handle_contract_event)
         self.event_engine.register(EVENT_ORIGINAL_TICK, self.handle_original_tick)
+        self.event_engine.register(EVENT_TIMER, self.handle_timer)
 
     def connect_ctp(self) -> None:
         """
@@ -98,8 +132,9 @@ class TickRecorder:
         if contract.product != Product.FUTURES:
             return
 
-        # 缓存合约对象
+        # 缓存合约对象及其交易所代码
         self.contracts[contract.symbol] = contract
+        self._exchange_value_for[contract.symbol] = contract.exchange.value
 
         # 发送订阅请求
         subscribe_req = SubscribeRequest(
@@ -111,35 +146,159 @@ class TickRecorder:
     def handle_original_tick(self, event: Event) -> None:
         """
         原始Tick事件处理函数（EVENT_ORIGINAL_TICK）：
-            - 获取底层发来的原始tick字典o_tick，并补充交易所和本地时间等信息后写入txt文件。
+            - 获取底层发来的原始tick字典o_tick，并补充交易所和本地时间等信息后写入csv文件。
         """
         o_tick: dict = event.data
         symbol: str = o_tick.get('InstrumentID', None)
-        contract: ContractData = self.contracts.get(symbol, None)
+        exchange_value: str = self._exchange_value_for.get(symbol, None)
 
         # 如果在字典中找不到合约信息，则跳过（一般说明该合约不是期货或未正常订阅）
-        if not contract:
+        if not exchange_value:
             return
 
         # 为o_tick补充ExchangeID和本地时间
-        o_tick['ExchangeID'] = contract.exchange.value
-        o_tick['localtime'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        o_tick['ExchangeID'] = exchange_value
+        o_tick['localtime'] = self._get_localtime()
 
-        # 将原始tick写入本地txt文件
+        # 将原始tick写入本地csv文件
         self.append_tick_to_file(o_tick=o_tick)
 
+    def handle_timer(self, event: Event) -> None:
+        """
+        定时器事件处理函数（EVENT_TIMER，事件引擎默认每秒触发一次）：
+            - 只将最早一条tick已等待超过self._flush_interval秒的缓冲区写入磁盘，作为不活跃合约的兜底。
+            - 与tick事件在同一个事件引擎线程中处理，写文件时不会与追加tick相互交错。
+        """
+        now = time.time()
+        for file_name, started in list(self._buffer_started.items()):
+            if now - started >= self._flush_interval:
+                self._write_buffer(file_name)
+
+    def _get_localtime(self) -> str:
+        """
+        返回当前本地时间字符串（精确到秒，格式如"2024-12-02 21:00:05"）。
+        同一秒内收到的tick复用已格式化的结果，只在进入新的一秒时调用一次strftime。
+        """
+        second = int(time.time())
+        if second != self._localtime_second:
+            self._localtime_second = second
+            self._localtime_str = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second))
+
+        return self._localtime_str
+
     def append_tick_to_file(self, o_tick: dict) -> None:
         """
-        将原始tick（dict格式）追加写入txt文件，每个tick占一行。
-        文件名示例： AP303.CZCE.txt
+        将原始tick（dict格式）按固定列顺序放入对应合约的缓冲区，
+        缓冲区攒满self._buffer_limit条后再一次性追加写入csv文件，每个tick占一行。
+        文件名示例： AP303.CZCE.csv（二进制格式为AP303.CZCE.bin）
         """
-        file_name = f"{o_tick['InstrumentID']}.{o_tick['ExchangeID']}.txt"
+        if self.binary:
+            self._append_record(o_tick)
+            return
+
+        file_name = f"{o_tick['InstrumentID']}.{o_tick['ExchangeID']}.csv"
+
+        row_getter: itemgetter = self._row_getters.get(file_name, None)
+        if not row_getter:
+            row_getter = self._load_header(file_name, o_tick)
+
+        # 由itemgetter在C层面按列顺序一次取出整行的值
+        try:
+            row: tuple = row_getter(o_tick)
+        except KeyError:
+            # 个别tick缺少表头中的字段时，缺失值留空
+            row = tuple(o_tick.get(key, '') for key in self._headers[file_name])
+
+        self._buffer_row(file_name, row)
+
+    def _append_record(self, o_tick: dict) -> None:
+        """
+        将原始tick打包为一条定长二进制记录放入对应合约的缓冲区，攒满后整批追加写入bin文件。
+        """
+        file_name = f"{o_tick['InstrumentID']}.{o_tick['ExchangeID']}.bin"
+
+        self._buffer_row(file_name, pack_tick(o_tick))
+
+    def _buffer_row(self, file_name: str, row: tuple | bytes) -> None:
+        """
+        将一行数据放入对应文件的缓冲区（缓冲区为空时记录首行的时间，供定时写盘判断），攒满后整批写入。
+        """
+        buffer: list[tuple | bytes] = self._buffers[file_name]
+        if not buffer:
+            self._buffer_started[file_name] = time.time()
+
+        buffer.append(row)
+
+        if len(buffer) >= self._buffer_limit:
+            self._write_buffer(file_name)
+
+    def _load_header(self, file_name: str, o_tick: dict) -> itemgetter:
+        """
+        首次写入某合约时确定csv文件的列顺序，并返回按该顺序取值的itemgetter：
+            - 新文件：以当前tick的字段名（排序后）作为表头
+            - 已有文件（如盘中重启）：沿用文件中已有的表头，保证列顺序一致
+        """
+        file_path: Path = self.data_directory.joinpath(file_name)
+
+        header: list[str] = []
+        if file_path.exists():
+            with open(file_path, mode='r', newline='', encoding='utf-8') as f:
+                header = next(csv.reader(f), [])
+
+        if not header:
+            header = sorted(o_tick.keys())
+
+        row_getter = itemgetter(*header)
+
+        self._headers[file_name] = header
+        self._row_getters[file_name] = row_getter
+        return row_getter
+
+    def _write_buffer(self, file_name: str) -> None:
+        """
+        将某合约缓冲区中的全部tick一次性追加写入文件（csv文件为空时先写表头），然后清空缓冲区。
+        """
+        buffer: list[tuple | bytes] = self._buffers[file_name]
+        if not buffer:
+            return
+
         file_path: Path = self.data_directory.joinpath(file_name)
 
-        # 以追加(a+)模式打开txt文件，编码方式为utf-8
-        with open(file_path, mode='a+', encoding='utf-8') as f:
-            # 在每条tick前添加换行符\n，再将字典转为字符串写入
-            f.write(f"\n{o_tick}")
+        # 二进制记录直接拼接后整块写入
+        if file_path.suffix == '.bin':
+            with open(file_path, mode='ab') as f:
+                f.write(b''.join(buffer))
+
+            buffer.clear()
+            self._buffer_started.pop(file_name, None)
+            return
+
+        # 以追加模式打开，整批数据只需一次打开/关闭
+        with open(file_path, mode='a', newline='', buffering=1 << 20, encoding='utf-8') as f:
+            writer = csv.writer(f)
+
+            if not f.tell():
+                writer.writerow(self._headers[file_name])
+
+            writer.writerows(buffer)
+
+        buffer.clear()
+        self._buffer_started.pop(file_name, None)
+
+    def flush_buffers(self) -> None:
+        """
+        将所有合约缓冲区中剩余的tick写入磁盘。
+        """
+        for file_name in list(self._buffers):
+            self._write_buffer(file_name)
+
+    def close(self) -> None:
+        """
+        停止录制：先停止事件引擎（等待正在处理的tick事件完成，之后不会再有写入），
+        再在当前线程中将缓冲区中剩余的tick写入磁盘。
+        """
+        self.event_engine.stop()
+        self.flush_buffers()
 
 # 如果需要直接运行该脚本来录制数据，可在此处执行
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+"""
+tick_reader.py与tick_binary.py的回归测试：只依赖numpy与pandas，无需安装vnpy。
+运行方式：python -m pytest -q
+"""
+
+from pathlib import Path
+from datetime import datetime
+import sys
+import csv
+import pytest
+from tick_reader import FLOAT_COLUMNS, _TXT_KEY_RE, _TXT_LINE_RE, iter_tick_values
+from tick_binary import TICK_DTYPE, pack_tick
+
+
+def make_tick(i: int) -> dict:
+    """构造一条字段齐全的原始tick（其中BidPrice2为浮点数极限值）"""
+    tick = {column: float(i) for column in FLOAT_COLUMNS}
+    tick['LastPrice'] = 4000.0 + i
+    tick['BidPrice2'] = sys.float_info.max
+    tick.update({
+        'InstrumentID': 'IC2412',
+        'ExchangeID': 'CFFEX',
+        'ActionDay': '20241202',
+        'UpdateTime': f'21:00:{i:02d}',
+        'UpdateMillisec': 500,
+        'localtime': f'2024-12-02 21:00:{i:02d}',
+    })
+    return tick
+
+
+def write_legacy_txt(file_path: Path, ticks: list[dict], newline: str) -> None:
+    """按旧版录制脚本的格式（每条记录前一个换行符）以文本模式写出txt文件"""
+    with open(file_path, mode='w', encoding='utf-8', newline=newline) as f:
+        for tick in ticks:
+            f.write('\n{' + '， '.join(f'{key}: {value}' for key, value in tick.items()) + '}')
+
+
+def read_all(file_path: Path, exchange_is_dce: bool = False) -> tuple[list, list, list]:
+    rows, dt_list, localtime_list = [], [], []
+    for chunk_rows, chunk_dt, chunk_localtime in iter_tick_values(file_path, exchange_is_dce):
+        rows.extend(chunk_rows)
+        dt_list.extend(chunk_dt)
+        localtime_list.extend(chunk_localtime)
+    return rows, dt_list, localtime_list
+
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n'])
+def test_legacy_txt_line_endings(tmp_path: Path, newline: str):
+    file_path = tmp_path / 'IC2412.CFFEX.txt'
+    write_legacy_txt(file_path, [make_tick(i) for i in range(3)], newline)
+
+    rows, dt_list, localtime_list = read_all(file_path)
+
+    assert len(rows) == 3
+    assert rows[1][FLOAT_COLUMNS.index('LastPrice')] == 4001.0
+    assert rows[1][FLOAT_COLUMNS.index('BidPrice2')] == 0.0
+    assert dt_list[1] == datetime(2024, 12, 2, 21, 0, 1, 500000)
+    assert localtime_list[2] == datetime(2024, 12, 2, 21, 0, 2)
+
+
+def test_txt_header_skips_lone_carriage_return():
+    data = b'\r\nLastPrice\x1f1.0\x1fUpdateTime\x1f21:00:00\r\n'
+
+    first_line = _TXT_LINE_RE.search(data)
+
+    assert _TXT_KEY_RE.findall(data, first_line.start(), first_line.end()) == [b'LastPrice', b'UpdateTime']
+
+
+def write_csv(file_path: Path, ticks: list[dict]) -> None:
+    """按录制脚本的格式写出csv文件（表头为首条tick排序后的字段名，缺失的字段留空）"""
+    header = sorted(ticks[0])
+    with open(file_path, mode='w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows([tick.get(key, '') for key in header] for tick in ticks)
+
+
+def test_csv_empty_float_field_is_zero(tmp_path: Path):
+    ticks = [make_tick(i) for i in range(3)]
+    del ticks[1]['BidVolume2']
+
+    file_path = tmp_path / 'IC2412.CFFEX.csv'
+    write_csv(file_path, ticks)
+
+    rows, dt_list, localtime_list = read_all(file_path)
+
+    assert len(rows) == 3
+    assert rows[1][FLOAT_COLUMNS.index('BidVolume2')] == 0.0
+    assert rows[2][FLOAT_COLUMNS.index('BidVolume2')] == 2.0
+
+
+def test_csv_row_without_update_time_is_skipped(tmp_path: Path):
+    ticks = [make_tick(i) for i in range(3)]
+    ticks[1]['UpdateTime'] = ''
+    ticks[1]['UpdateMillisec'] = ''
+    ticks[2]['UpdateMillisec'] = ''
+
+    file_path = tmp_path / 'IC2412.CFFEX.csv'
+    write_csv(file_path, ticks)
+
+    rows, dt_list, localtime_list = read_all(file_path)
+
+    assert len(rows) == 2
+    assert dt_list == [datetime(2024, 12, 2, 21, 0, 0, 500000), datetime(2024, 12, 2, 21, 0, 2)]
+
+
+@pytest.mark.parametrize('exchange_is_dce', [False, True])
+def test_bin_round_trip(tmp_path: Path, exchange_is_dce: bool):
+    ticks = [make_tick(i) for i in range(4)]
+    for tick in ticks:
+        tick['ActionDay'] = '20241203'  # 夜盘ActionDay为次日（大商所的情况）
+    ticks[1]['ActionDay'] = ''
+    ticks[2]['UpdateTime'] = ''
+    del ticks[3]['BidVolume2']
+
+    # 末尾附加半条记录，模拟录制进程被强制结束时未写完的数据
+    file_path = tmp_path / 'IC2412.CFFEX.bin'
+    file_path.write_bytes(b''.join(pack_tick(tick) for tick in ticks) + bytes(TICK_DTYPE.itemsize // 2))
+
+    rows, dt_list, localtime_list = read_all(file_path, exchange_is_dce)
+
+    # DCE或ActionDay为空时以本地日期（12月2日）为准，其余使用ActionDay（12月3日）
+    action_day = 2 if exchange_is_dce else 3
+    assert dt_list == [
+        datetime(2024, 12, action_day, 21, 0, 0, 500000),
+        datetime(2024, 12, 2, 21, 0, 1, 500000),
+        datetime(2024, 12, action_day, 21, 0, 3, 500000),
+    ]
+    assert localtime_list[2] == datetime(2024, 12, 2, 21, 0, 3)
+    assert rows[0][FLOAT_COLUMNS.index('LastPrice')] == 4000.0
+    assert rows[0][FLOAT_COLUMNS.index('BidPrice2')] == 0.0
+    assert rows[2][FLOAT_COLUMNS.index('BidVolume2')] == 0.0
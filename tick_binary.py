@@ -0,0 +1,108 @@
+"""
+功能概述：
+    定义Tick数据的定长二进制记录格式（.bin文件），供录制脚本写入、解析脚本读取。
+    1. 录制时每条tick按固定结构（struct）打包为定长字节，直接追加到文件末尾。
+    2. 读取时将整个文件以内存映射的方式视为numpy结构化数组，无需任何文本解析，数值字段可直接按列取出。
+
+说明：
+    - 二进制格式只保存合成TickData所需的时间与数值字段，不保留原始tick的全部字段；
+      需要完整原始数据时请使用默认的csv格式录制。
+    - 记录为小端序、无对齐填充，字段顺序调整后与已录制的文件不再兼容。
+"""
+
+from pathlib import Path
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from operator import itemgetter
+import struct
+import numpy as np
+
+# 二进制记录中保存的数值字段（与解析脚本中的FLOAT_COLUMNS为同一组字段，读取时按字段名取出）
+FLOAT_FIELDS = [
+    'LastPrice', 'OpenPrice', 'HighestPrice', 'LowestPrice', 'PreClosePrice',
+    'BidPrice1', 'BidPrice2', 'BidPrice3', 'BidPrice4', 'BidPrice5',
+    'AskPrice1', 'AskPrice2', 'AskPrice3', 'AskPrice4', 'AskPrice5',
+    'Volume', 'Turnover', 'OpenInterest', 'UpperLimitPrice', 'LowerLimitPrice',
+    'BidVolume1', 'BidVolume2', 'BidVolume3', 'BidVolume4', 'BidVolume5',
+    'AskVolume1', 'AskVolume2', 'AskVolume3', 'AskVolume4', 'AskVolume5'
+]
+
+# 每条记录的结构：
+#   ActionDay   int32  自1970-01-01起的天数，字段为空时为-1
+#   UpdateTime  int32  当日毫秒数（已含UpdateMillisec），字段为空时为-1
+#   localtime   int64  本地时间自1970-01-01 00:00:00起的秒数（不含时区）
+#   其后为FLOAT_FIELDS中的各字段，均为float64
+TICK_STRUCT = struct.Struct('<iiq' + 'd' * len(FLOAT_FIELDS))
+
+# 与TICK_STRUCT逐字节对应的numpy结构化类型，读取时直接映射文件内容
+TICK_DTYPE = np.dtype(
+    [('ActionDay', '<i4'), ('UpdateTime', '<i4'), ('localtime', '<i8')]
+    + [(field, '<f8') for field in FLOAT_FIELDS]
+)
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+_SECOND = timedelta(seconds=1)
+
+_get_float_fields = itemgetter(*FLOAT_FIELDS)
+
+
+def pack_tick(o_tick: dict) -> bytes:
+    """
+    将原始tick字典打包为一条定长二进制记录。
+    日期、时间等字符串字段在同一秒内大量重复，转换结果均做了缓存。
+    """
+    update_time: int = _parse_update_time(o_tick.get('UpdateTime', ''))
+    if update_time >= 0:
+        update_time += int(o_tick.get('UpdateMillisec') or 0)
+
+    # 由itemgetter在C层面一次取出全部数值字段
+    try:
+        float_values: tuple = _get_float_fields(o_tick)
+    except KeyError:
+        # 个别tick缺少数值字段时按0写入（与csv格式中缺失值留空、读取时置为0的处理一致）
+        float_values = tuple(o_tick.get(field, 0.0) for field in FLOAT_FIELDS)
+
+    return TICK_STRUCT.pack(
+        _parse_action_day(o_tick.get('ActionDay', '')),
+        update_time,
+        _parse_localtime(o_tick['localtime']),
+        *float_values
+    )
+
+
+def read_tick_records(file_path: Path) -> np.ndarray:
+    """
+    以只读内存映射的方式打开二进制tick文件，返回TICK_DTYPE类型的结构化数组。
+    文件末尾不完整的记录（如录制进程被强制结束时）会被忽略。
+    """
+    count: int = file_path.stat().st_size // TICK_DTYPE.itemsize
+    if not count:
+        return np.empty(0, dtype=TICK_DTYPE)
+
+    return np.memmap(file_path, dtype=TICK_DTYPE, mode='r', shape=(count,))
+
+
+@lru_cache(maxsize=16)
+def _parse_action_day(action_day: str) -> int:
+    """"YYYYMMDD"转为自1970-01-01起的天数，为空时返回-1"""
+    if not action_day:
+        return -1
+
+    day = date(int(action_day[:4]), int(action_day[4:6]), int(action_day[6:8]))
+    return day.toordinal() - _EPOCH_ORDINAL
+
+
+@lru_cache(maxsize=4096)
+def _parse_update_time(update_time: str) -> int:
+    """"HH:MM:SS"转为当日毫秒数，为空时返回-1"""
+    if not update_time:
+        return -1
+
+    return (int(update_time[:2]) * 3600 + int(update_time[3:5]) * 60 + int(update_time[6:8])) * 1000
+
+
+@lru_cache(maxsize=64)
+def _parse_localtime(localtime: str) -> int:
+    """"YYYY-MM-DD HH:MM:SS"转为自1970-01-01 00:00:00起的秒数"""
+    return (datetime.fromisoformat(localtime) - _EPOCH) // _SECOND
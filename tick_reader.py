@@ -0,0 +1,255 @@
+"""
+功能概述：
+    读取录制的tick文件并完成类型转换，供 load_tick_data.py 与 transform_tick_data.py 共用。
+    1. 支持录制脚本写出的csv文件、二进制格式的bin文件（格式见tick_binary.py）以及旧版录制脚本写出的txt文件。
+    2. 按块流式读取，每块整体完成类型转换，内存占用只与块大小有关，与文件大小无关。
+    3. 每块返回按FLOAT_COLUMNS顺序排列的数值行及对应的时间戳，构造TickData时按位置直接解包。
+"""
+
+from pathlib import Path
+from tick_binary import read_tick_records
+import sys
+import io
+import csv
+import re
+from collections import defaultdict
+from typing import Iterator
+import numpy as np
+from numpy.lib.recfunctions import structured_to_unstructured
+import pandas as pd
+
+# 同一合约存在多种格式的文件时的读取优先顺序：录制脚本写出的csv、二进制bin、旧版txt
+TICK_SUFFIXES = ['.csv', '.bin', '.txt']
+
+# 流式读取时每块的最大行数（csv、bin）与最大字节数（旧版txt）
+CHUNK_SIZE = 50000
+CHUNK_BYTES = 64 * 1024 * 1024
+
+# 解析txt时用于替换原始分隔符的单字符分隔符（原始行情数据中不会出现）
+_SEP = '\x1f'
+_SEP_BYTES = _SEP.encode('utf-8')
+
+# 旧版txt文件中键值对之间的分隔符（中文逗号+空格）
+_TXT_FIELD_SEP = '， '.encode('utf-8')
+
+# 预编译的正则：定位首条非空记录，以及从替换分隔符后的记录中一次扫描取出全部字段名（每个匹配为"key\x1fvalue\x1f"）；
+# 回车符与换行符同样视为行尾，单独的"\r"不会被当作首条记录
+_TXT_LINE_RE = re.compile(b'[^\r\n]+')
+_TXT_KEY_RE = re.compile(b'([^\x1f\r\n]*)\x1f[^\x1f\r\n]*\x1f?')
+
+# 可能被填为浮点数极限值（sys.float_info.max）的价格字段，转换时需置为0
+PRICE_COLUMNS = [
+    'LastPrice', 'OpenPrice', 'HighestPrice', 'LowestPrice', 'PreClosePrice',
+    'BidPrice1', 'BidPrice2', 'BidPrice3', 'BidPrice4', 'BidPrice5',
+    'AskPrice1', 'AskPrice2', 'AskPrice3', 'AskPrice4', 'AskPrice5'
+]
+
+# 构造TickData时需要转换为float的全部字段（价格列在前，便于整块处理极端值）
+# 注意：构造TickData时按此顺序解包每行数据，调整顺序时需同步修改
+FLOAT_COLUMNS = PRICE_COLUMNS + [
+    'Volume', 'Turnover', 'OpenInterest', 'UpperLimitPrice', 'LowerLimitPrice',
+    'BidVolume1', 'BidVolume2', 'BidVolume3', 'BidVolume4', 'BidVolume5',
+    'AskVolume1', 'AskVolume2', 'AskVolume3', 'AskVolume4', 'AskVolume5'
+]
+
+# 解析时各列的类型：数值字段由pandas的C解析器直接转为float64（round_trip保证与float()结果一致），
+# 毫秒数同样先按float64解析（允许为空，过滤掉无效记录后再转为整数），其余保留字符串
+_COLUMN_DTYPES = defaultdict(lambda: object, {column: 'float64' for column in FLOAT_COLUMNS})
+_COLUMN_DTYPES['UpdateMillisec'] = 'float64'
+
+# 数值字段中的空值（录制时tick缺少该字段会写为空字符串）解析为NaN，转换时再统一置为0，
+# 避免个别tick缺字段导致整块数据无法解析；其余字段的空字符串保持原样
+_NA_VALUES = {column: [''] for column in FLOAT_COLUMNS + ['UpdateMillisec']}
+
+
+def find_tick_file(folder_path: Path, vt_symbol: str) -> Path | None:
+    """
+    按TICK_SUFFIXES的优先顺序查找某合约的tick文件，找不到时返回None。
+    """
+    for suffix in TICK_SUFFIXES:
+        file_path = folder_path / f"{vt_symbol}{suffix}"
+        if file_path.exists():
+            return file_path
+
+    return None
+
+
+def iter_tick_values(
+    file_path: Path,
+    exchange_is_dce: bool
+) -> Iterator[tuple[list[list[float]], np.ndarray, np.ndarray]]:
+    """
+    按块流式读取tick文件，每次返回一块已完成类型转换的数据(rows, dt_list, localtime_list)：
+        - rows：每行为按FLOAT_COLUMNS顺序排列的float列表，极端价格已置为0
+        - dt_list：每行对应的行情时间（datetime）
+        - localtime_list：每行对应的本地接收时间（datetime）
+    exchange_is_dce：是否为大商所合约（大商所夜盘的ActionDay会变成次日，需以本地日期为准）
+    """
+    # bin文件以内存映射方式打开，每次直接取出CHUNK_SIZE条记录，无需解析
+    if file_path.suffix == '.bin':
+        records = read_tick_records(file_path)
+        for start in range(0, len(records), CHUNK_SIZE):
+            yield _records_to_values(records[start:start + CHUNK_SIZE], exchange_is_dce)
+        return
+
+    for df in iter_tick_frames(file_path):
+        yield _frame_to_values(df, exchange_is_dce)
+
+
+def iter_tick_frames(file_path: Path) -> Iterator[pd.DataFrame]:
+    """
+    按文件格式（csv或旧版txt）流式读取文件，每次返回一块解析好的DataFrame，列名为原始字段名：
+    FLOAT_COLUMNS中的数值字段由pandas的C解析器直接转换为float64，其余字段保留为字符串。
+    - csv：录制脚本写出的带表头csv文件
+    - txt：旧版录制脚本写出的"{key: value， ...}"逐行文本
+    """
+    # 空文件中没有任何数据
+    if not file_path.stat().st_size:
+        return
+
+    if file_path.suffix == '.csv':
+        with pd.read_csv(
+            file_path,
+            dtype=_COLUMN_DTYPES,
+            keep_default_na=False,
+            na_values=_NA_VALUES,
+            float_precision='round_trip',
+            chunksize=CHUNK_SIZE
+        ) as reader:
+            yield from reader
+        return
+
+    # 旧版txt文件：每次整块读取CHUNK_BYTES字节，再补读到行尾，保证每块都是完整的行；
+    # 不逐行迭代，也不逐行判断空行（旧版每条记录前的换行符产生的空行由pandas解析时统一跳过）
+    with open(file_path, mode='rb') as f:
+        while True:
+            data: bytes = f.read(CHUNK_BYTES)
+            if not data:
+                break
+
+            df = _parse_txt_frame(data + f.readline())
+            if df is not None:
+                yield df
+
+
+def _parse_txt_frame(data: bytes) -> pd.DataFrame | None:
+    """
+    将多行"{key: value， ...}"形式的原始字节一次性解析为DataFrame（全为空行时返回None）。
+    字段顺序由首条记录确定，之后每个值在文件中的列位置固定，可按位置直接指定各列的类型。
+    """
+    # 直接在utf-8字节上处理（比含中文的str更快，也省去一次解码）：
+    # 先用一次translate去除大括号及回车符（Windows下以文本模式录制的文件换行为\r\n，二进制读取时会保留\r），再去除空引号；
+    # 再把键值对之间的"， "（中文逗号+空格）与键值之间的": "统一换成单字符分隔符，
+    # 这样每行就是"key, value, key, value..."交替排列，可直接交给pandas的C解析器一次性切分（空行自动跳过）
+    clean_data = (data.translate(None, b'{}\r')
+                      .replace(b"''", b'')
+                      .replace(_TXT_FIELD_SEP, _SEP_BYTES)
+                      .replace(b': ', _SEP_BYTES))
+
+    # 偶数列为字段名、奇数列为对应的值：字段名列只用于占位，解析时直接跳过
+    first_line = _TXT_LINE_RE.search(clean_data)
+    if not first_line:
+        return None
+
+    keys: list[str] = [
+        key.decode('utf-8') for key in _TXT_KEY_RE.findall(clean_data, first_line.start(), first_line.end())
+    ]
+
+    names: list[str] = []
+    for i, key in enumerate(keys):
+        names.extend([f'_key{i}', key])
+
+    return pd.read_csv(
+        io.BytesIO(clean_data),
+        sep=_SEP,
+        encoding='utf-8',
+        header=None,
+        names=names,
+        usecols=keys,
+        dtype=_COLUMN_DTYPES,
+        keep_default_na=False,
+        na_values=_NA_VALUES,
+        quoting=csv.QUOTE_NONE,
+        float_precision='round_trip'
+    )
+
+
+def _frame_to_values(
+    df: pd.DataFrame,
+    exchange_is_dce: bool
+) -> tuple[list[list[float]], np.ndarray, np.ndarray]:
+    """
+    将一块已解析的原始数据df按列整体完成类型转换。
+    """
+    # 没有时间戳的记录视为无效
+    df = df[df['UpdateTime'] != '']
+
+    # 本地时间格式固定，整列一次性解析（同一秒内的时间戳大量重复，cache效果明显）
+    local_time = pd.to_datetime(df['localtime'], format='%Y-%m-%d %H:%M:%S', cache=True)
+
+    # 大商所(DCE)夜盘时ActionDay会变成次日，或者ActionDay字段为空时，则以本地日期为准
+    if exchange_is_dce:
+        date = local_time.dt.normalize()
+    else:
+        date = pd.to_datetime(df['ActionDay'], format='%Y%m%d', cache=True)
+        date = date.fillna(local_time.dt.normalize())
+
+    # UpdateTime固定为"HH:MM:SS"：按字节取出每一位数字，直接用整数运算得到当日毫秒数，
+    # 无需逐条解析时间字符串；再加上UpdateMillisec，与日期相加即为完整时间戳
+    digits = df['UpdateTime'].to_numpy().astype('S8').view(np.uint8).reshape(-1, 8).astype(np.int64) - ord('0')
+    seconds = (
+        (digits[:, 0] * 10 + digits[:, 1]) * 3600
+        + (digits[:, 3] * 10 + digits[:, 4]) * 60
+        + digits[:, 6] * 10 + digits[:, 7]
+    )
+    milliseconds = seconds * 1000 + df['UpdateMillisec'].fillna(0).to_numpy(dtype=np.int64)
+
+    dt_list = pd.DatetimeIndex(date.to_numpy() + milliseconds.astype('timedelta64[ms]')).to_pydatetime()
+    localtime_list = local_time.array.to_pydatetime()
+
+    # 价格、成交量等字段已在解析时转为float64，这里整体取出为一个连续的数组（拷贝，便于原地修改）
+    values = df[FLOAT_COLUMNS].to_numpy(dtype='float64', copy=True)
+
+    # 缺失的数值字段（解析为NaN）置为0
+    values[np.isnan(values)] = 0.0
+
+    return _values_to_rows(values), dt_list, localtime_list
+
+
+def _records_to_values(
+    records: np.ndarray,
+    exchange_is_dce: bool
+) -> tuple[list[list[float]], np.ndarray, np.ndarray]:
+    """
+    将一块从bin文件中映射出的二进制记录按列取出：时间字段已是整数，数值字段已是float64，无需任何解析。
+    """
+    # 没有时间戳的记录视为无效
+    records = records[records['UpdateTime'] >= 0]
+
+    local_time = records['localtime'].astype('datetime64[s]')
+
+    # 大商所(DCE)或ActionDay字段为空时，以本地日期为准
+    date = local_time.astype('datetime64[D]')
+    if not exchange_is_dce:
+        action_day = records['ActionDay']
+        date = np.where(action_day >= 0, action_day.astype('datetime64[D]'), date)
+
+    # UpdateTime在录制时已转为当日毫秒数（含UpdateMillisec），与日期相加即为完整时间戳
+    dt_list = pd.DatetimeIndex(date + records['UpdateTime'].astype('timedelta64[ms]')).to_pydatetime()
+    localtime_list = pd.DatetimeIndex(local_time).to_pydatetime()
+
+    # 按FLOAT_COLUMNS的顺序取出数值字段，拼成一个连续的float64数组（拷贝，便于原地修改）
+    values = structured_to_unstructured(records[FLOAT_COLUMNS], dtype=np.float64, copy=True)
+
+    return _values_to_rows(values), dt_list, localtime_list
+
+
+def _values_to_rows(values: np.ndarray) -> list[list[float]]:
+    """
+    将按FLOAT_COLUMNS顺序排列的数值数组中的极端价格置为0后，整块转为Python的list（每行为一个float列表）。
+    """
+    # 极端价格（sys.float_info.max）视为无效置为0：FLOAT_COLUMNS前段即为价格列，切片为视图，原地修改
+    prices = values[:, :len(PRICE_COLUMNS)]
+    prices[prices == sys.float_info.max] = 0.0
+
+    return values.tolist()
@@ -1,8 +1,9 @@
 """
 功能概述：
-    1. 读取本地txt文件中的原始Tick数据并转换为TickData。
+    1. 按块流式读取本地csv（或二进制bin、旧版txt）文件中的原始Tick数据并转换为TickData。
     2. 使用BarGenerator对TickData进行合成，生成1分钟K线（BarData）。
-    3. 将合成后的Bar数据存储在一个DataFrame中，最终保存为CSV文件。
+    3. 将合成后的Bar数据按列存储在预分配的数组中，最终构建DataFrame并保存为CSV文件。
+    4. 直接运行脚本时，自动扫描tick文件夹中录制过的全部合约，按合约多进程并行转换。
 
 依赖：
     - BarGenerator：需要在自定义模块bargenerator4record中提前定义好BarGenerator类。
@@ -10,7 +11,7 @@
     - pandas：用于将最终结果写出CSV。
 
 使用前：
-    - 请先确认好读取txt文件的位置或文件夹名称（如 'tick_data_night' / 'tick_data_day'）。
+    - 请先确认好读取tick文件的位置或文件夹名称（如 'tick_data_night' / 'tick_data_day'）。
     - 可以在合成逻辑内，根据需要合成1分钟、5分钟或者其他周期的Bar。
 """
 
@@ -19,9 +20,11 @@ from vnpy.trader.constant import Exchange
 from datetime import datetime
 from vnpy.trader.utility import extract_vt_symbol
 from vnpy.trader.object import TickData, BarData
-import sys
+from tick_reader import TICK_SUFFIXES, find_tick_file, iter_tick_values
+import os
+from multiprocessing import Pool
+import numpy as np
 import pandas as pd
-from datetime import datetime
 from bargenerator4record.BarGenerator import BarGenerator
 
 # 定义导出CSV时的列名
@@ -30,10 +33,34 @@ COLUMNS = [
     'open_interest', 'open_price', 'high_price', 'low_price', 'close_price'
 ]
 
+# 各列Bar数据的存储类型，用于预分配numpy数组（字符串列为object，数值列为float64）
+COL_DTYPES = {
+    'symbol': object,
+    'exchange': object,
+    'datetime': 'datetime64[ns]',
+    'interval': object,
+    'volume': 'float64',
+    'turnover': 'float64',
+    'open_interest': 'float64',
+    'open_price': 'float64',
+    'high_price': 'float64',
+    'low_price': 'float64',
+    'close_price': 'float64'
+}
+
+# 同一合约的转换过程中取值不变的列：不逐根Bar写入，导出时按最终的Bar数量一次性填充
+CONSTANT_COLUMNS = ['symbol', 'exchange', 'interval']
+
+# 预分配的Bar行数（一个交易日的1分钟Bar约数百根），不够时再成倍扩容
+BAR_CAPACITY = 1024
+
+# 存放tick文件的文件夹（夜盘、日盘），按先后顺序读取
+FOLDER_LIST = ['tick_data_night', 'tick_data_day']
+
 class TickToBarConverter:
     """
     TickToBarConverter:
-        - 读取txt文件中的字符串数据并解析为TickData
+        - 读取tick文件（csv、二进制bin或旧版txt）中的数据并解析为TickData
         - 使用BarGenerator合成1分钟Bar
         - 将结果保存到DataFrame并导出为csv
     """
@@ -41,167 +68,196 @@ class TickToBarConverter:
         """
         构造函数：
             - vt_symbol 例如： 'IC2309.CFFEX'
-            - 实例化一个BarGenerator并准备好DataFrame。
+            - 实例化一个BarGenerator并为Bar数据预分配按列存储的数组。
         """
         self.vt_symbol = vt_symbol
 
+        # symbol与exchange在整个转换过程中不变，只需解析一次
+        self.symbol, self.exchange = extract_vt_symbol(vt_symbol)
+        self._exchange_is_dce: bool = self.exchange == Exchange.DCE
+
         # 创建BarGenerator实例，用于合成指定周期的K线
         self.bg = BarGenerator(self.on_bar)
 
-        # 存放最终生成的Bar数据（DataFrame）
-        self.df = pd.DataFrame(columns=COLUMNS)
+        # 存放最终生成的Bar数据：每列一个预分配的numpy数组，self._n为已写入的行数
+        self._cols: dict[str, np.ndarray] = {
+            column: np.empty(BAR_CAPACITY, dtype=COL_DTYPES[column])
+            for column in COLUMNS if column not in CONSTANT_COLUMNS
+        }
+        self._n: int = 0
+
+        # 不变列的取值（interval在收到第一根Bar时确定）
+        self._constants: dict[str, str] = {
+            'symbol': self.symbol,
+            'exchange': self.exchange.value,
+            'interval': ''
+        }
 
     def on_bar(self, bar: BarData):
         """
-        合成1分钟Bar后会调用该回调，将BarData信息追加到DataFrame中。
+        合成1分钟Bar后会调用该回调，将BarData的各字段按下标直接写入对应列的数组中。
+        symbol、exchange、interval对同一合约的所有Bar都相同，不逐根写入。
         """
-        bar_dict = bar.__dict__.copy()
+        n = self._n
+        if n == len(self._cols['datetime']):
+            self._grow()
+
+        if not n:
+            # 枚举类型转换为字符串存储
+            self._constants['interval'] = bar.interval.value
 
-        # 将枚举类型转换为字符串存储
-        bar_dict['exchange'] = bar_dict['exchange'].value
-        bar_dict['interval'] = bar_dict['interval'].value
-        
-        # 有些字段在vn.py中默认存在或不一定需要，如gateway_name、extra等，根据需要剔除
-        bar_dict.pop('gateway_name', None)
-        bar_dict.pop('extra', None)  # 如果BarData没有extra字段，则不会报错
+        cols = self._cols
 
-        # 追加到DataFrame
-        self.df.loc[len(self.df)] = bar_dict
+        cols['datetime'][n] = bar.datetime
+        cols['volume'][n] = bar.volume
+        cols['turnover'][n] = bar.turnover
+        cols['open_interest'][n] = bar.open_interest
+        cols['open_price'][n] = bar.open_price
+        cols['high_price'][n] = bar.high_price
+        cols['low_price'][n] = bar.low_price
+        cols['close_price'][n] = bar.close_price
+
+        self._n = n + 1
+
+    def _grow(self):
+        """
+        预分配的数组写满时，将每列容量扩大一倍（已写入的数据保留在前段）。
+        """
+        for column, array in self._cols.items():
+            self._cols[column] = np.resize(array, len(array) * 2)
 
     def start(self):
         """
         主流程：
             1. 遍历可能的文件夹（如白天、夜盘）
-            2. 将所有txt文件中的字符串转换为TickData并推送给BarGenerator
+            2. 将所有tick文件（csv、bin或txt）中的数据转换为TickData并推送给BarGenerator
             3. 最终将合成的BarData写出到csv
         """
         home_path = Path(__file__).parent
-        folder_list = ['tick_data_night', 'tick_data_day']
 
-        for folder_name in folder_list:
+        for folder_name in FOLDER_LIST:
             folder_path = home_path / folder_name
-            file_path = folder_path / f"{self.vt_symbol}.txt"
 
-            if not file_path.exists():
+            # 优先读取录制脚本写出的csv文件，其次为二进制格式的bin文件，最后兼容旧版txt文件
+            file_path = find_tick_file(folder_path, self.vt_symbol)
+            if not file_path:
                 continue
 
-            with open(file_path, mode='r', encoding='utf-8') as f:
-                data_str = f.read()
-                if data_str:
-                    self._process_tick_string(data_str)
+            # 按块流式读取并完成类型转换，内存占用只与块大小有关；
+            # 每行为按FLOAT_COLUMNS顺序排列的float列表，构造TickData时按位置解包
+            for rows, dt_list, localtime_list in iter_tick_values(file_path, self._exchange_is_dce):
+                for row, dt, localtime in zip(rows, dt_list, localtime_list):
+                    self._generate_tick(row, dt, localtime)
 
         self._to_csv()
 
-    def _process_tick_string(self, data_str: str):
-        """
-        将完整字符串分割为多行，每行解析为字典后再转换为TickData，并推送给BarGenerator。
-        """
-        lines = data_str.split('\n')
-        for line in lines:
-            if not line.strip():
-                continue
-            self._parse_line_to_tick(line)
-
-    def _parse_line_to_tick(self, line: str) -> None:
-        """
-        将每一行的原始字符串转换为TickData，然后给BarGenerator更新。
-        """
-        clean_str = (line.replace('{', '')
-                         .replace('}', '')
-                         .replace("''", ''))
-
-        # 使用中文逗号+空格做分割
-        fields = clean_str.split('， ')
-
-        tick_dict = {}
-        for field in fields:
-            kv = field.split(': ')
-            if len(kv) == 2:
-                tick_dict[kv[0]] = kv[1]
-
-        self._generate_tick(tick_dict)
-
-    def _generate_tick(self, data: dict):
+    def _generate_tick(
+        self,
+        row: list[float],
+        dt: datetime,
+        localtime: datetime
+    ):
         """
-        将字典转换为TickData，并推送给BarGenerator进行合成。
+        将已完成类型转换的一行数据（顺序与tick_reader.FLOAT_COLUMNS一致）转换为TickData，并推送给BarGenerator进行合成。
         """
-        if not data.get("UpdateTime", None):
-            return
-
-        symbol, exchange = extract_vt_symbol(self.vt_symbol)
-
-        # 大商所及无ActionDay时，以本地日期为准
-        if not data.get("ActionDay") or exchange == Exchange.DCE:
-            date_str = data['localtime'].split(' ')[0].replace('-', '')
-        else:
-            date_str = data["ActionDay"]
-
-        timestamp = f"{date_str} {data['UpdateTime']}.{data['UpdateMillisec']}"
-        dt = datetime.strptime(timestamp, "%Y%m%d %H:%M:%S.%f")
+        (
+            last_price, open_price, high_price, low_price, pre_close,
+            bid_price_1, bid_price_2, bid_price_3, bid_price_4, bid_price_5,
+            ask_price_1, ask_price_2, ask_price_3, ask_price_4, ask_price_5,
+            volume, turnover, open_interest, limit_up, limit_down,
+            bid_volume_1, bid_volume_2, bid_volume_3, bid_volume_4, bid_volume_5,
+            ask_volume_1, ask_volume_2, ask_volume_3, ask_volume_4, ask_volume_5
+        ) = row
 
         tick = TickData(
-            symbol=symbol,
-            exchange=exchange,
+            symbol=self.symbol,
+            exchange=self.exchange,
             datetime=dt,
-            volume=float(data["Volume"]),
-            turnover=float(data["Turnover"]),
-            open_interest=float(data["OpenInterest"]),
-            last_price=_adjust_price(float(data["LastPrice"])),
-            limit_up=float(data["UpperLimitPrice"]),
-            limit_down=float(data["LowerLimitPrice"]),
-            open_price=_adjust_price(float(data["OpenPrice"])),
-            high_price=_adjust_price(float(data["HighestPrice"])),
-            low_price=_adjust_price(float(data["LowestPrice"])),
-            pre_close=_adjust_price(float(data["PreClosePrice"])),
-            bid_price_1=_adjust_price(float(data["BidPrice1"])),
-            ask_price_1=_adjust_price(float(data["AskPrice1"])),
-            bid_volume_1=float(data["BidVolume1"]),
-            ask_volume_1=float(data["AskVolume1"]),
+            volume=volume,
+            turnover=turnover,
+            open_interest=open_interest,
+            last_price=last_price,
+            limit_up=limit_up,
+            limit_down=limit_down,
+            open_price=open_price,
+            high_price=high_price,
+            low_price=low_price,
+            pre_close=pre_close,
+            bid_price_1=bid_price_1,
+            bid_price_2=bid_price_2,
+            bid_price_3=bid_price_3,
+            bid_price_4=bid_price_4,
+            bid_price_5=bid_price_5,
+            ask_price_1=ask_price_1,
+            ask_price_2=ask_price_2,
+            ask_price_3=ask_price_3,
+            ask_price_4=ask_price_4,
+            ask_price_5=ask_price_5,
+            bid_volume_1=bid_volume_1,
+            bid_volume_2=bid_volume_2,
+            bid_volume_3=bid_volume_3,
+            bid_volume_4=bid_volume_4,
+            bid_volume_5=bid_volume_5,
+            ask_volume_1=ask_volume_1,
+            ask_volume_2=ask_volume_2,
+            ask_volume_3=ask_volume_3,
+            ask_volume_4=ask_volume_4,
+            ask_volume_5=ask_volume_5,
             gateway_name='local_gateway',
-            localtime=datetime.strptime(data['localtime'], '%Y-%m-%d %H:%M:%S')
+            localtime=localtime
         )
 
-        # 五档行情数据
-        if data.get("BidVolume2") or data.get("AskVolume2"):
-            tick.bid_price_2 = _adjust_price(float(data["BidPrice2"]))
-            tick.bid_price_3 = _adjust_price(float(data["BidPrice3"]))
-            tick.bid_price_4 = _adjust_price(float(data["BidPrice4"]))
-            tick.bid_price_5 = _adjust_price(float(data["BidPrice5"]))
-
-            tick.ask_price_2 = _adjust_price(float(data["AskPrice2"]))
-            tick.ask_price_3 = _adjust_price(float(data["AskPrice3"]))
-            tick.ask_price_4 = _adjust_price(float(data["AskPrice4"]))
-            tick.ask_price_5 = _adjust_price(float(data["AskPrice5"]))
-
-            tick.bid_volume_2 = float(data["BidVolume2"])
-            tick.bid_volume_3 = float(data["BidVolume3"])
-            tick.bid_volume_4 = float(data["BidVolume4"])
-            tick.bid_volume_5 = float(data["BidVolume5"])
-
-            tick.ask_volume_2 = float(data["AskVolume2"])
-            tick.ask_volume_3 = float(data["AskVolume3"])
-            tick.ask_volume_4 = float(data["AskVolume4"])
-            tick.ask_volume_5 = float(data["AskVolume5"])
-
         # 将TickData推送给BarGenerator更新
         self.bg.update_tick(tick)
 
     def _to_csv(self):
         """
-        将最终的DataFrame保存为CSV文件，文件名即vt_symbol.csv
+        将各列数组中已写入的部分直接构建为DataFrame并保存为CSV文件，文件名即vt_symbol.csv
+        不变列按已知的Bar数量、以COL_DTYPES中的类型一次性填充；各列均已是确定类型的数组，构建时无需推断类型，也不再拷贝。
         """
         csv_name = f"{self.vt_symbol}.csv"
-        self.df.to_csv(csv_name, index=False)
+        n = self._n
+
+        data: dict[str, np.ndarray] = {}
+        for column in COLUMNS:
+            if column in CONSTANT_COLUMNS:
+                data[column] = np.full(n, self._constants[column], dtype=COL_DTYPES[column])
+            else:
+                data[column] = self._cols[column][:n]
+
+        df = pd.DataFrame(data, copy=False)
+        df.to_csv(csv_name, index=False)
+
 
-def _adjust_price(price: float) -> float:
+def convert_symbol(vt_symbol: str) -> None:
     """
-    将极端价格（sys.float_info.max）视为无效置为0。
+    将单个合约的tick文件合成为1分钟Bar并导出csv。
+    定义为模块级函数，便于多进程时按合约分发（各合约的文件互不相关）。
     """
-    if price == sys.float_info.max:
-        return 0
-    return price
+    converter = TickToBarConverter(vt_symbol)
+    converter.start()
+
+
+def find_vt_symbols() -> list[str]:
+    """
+    扫描各tick文件夹，返回所有录制过的合约代码（文件名去掉后缀即为vt_symbol）。
+    """
+    home_path = Path(__file__).parent
+
+    vt_symbols = set()
+    for folder_name in FOLDER_LIST:
+        folder_path = home_path / folder_name
+        if not folder_path.exists():
+            continue
+
+        for file_path in folder_path.iterdir():
+            if file_path.suffix in TICK_SUFFIXES:
+                vt_symbols.add(file_path.stem)
+
+    return sorted(vt_symbols)
 
 
 if __name__ == "__main__":
-    converter = TickToBarConverter('IC2412.CFFEX')
-    converter.start()
+    # 每个合约单独一个任务，多进程并行转换（chunksize=1，避免大小不一的文件造成进程间负载不均）
+    with Pool(processes=os.cpu_count()) as pool:
+        pool.map(convert_symbol, find_vt_symbols(), chunksize=1)